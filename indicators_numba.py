@@ -0,0 +1,79 @@
+# indicators_numba.py
+# RSI / MACD kernels shared by the scanners, compiled with numba when it is installed.
+# - same Wilder / EMA seeding as ta's RSIIndicator and MACD, computed for the last bars only
+# - explicit signatures compile (or load from cache) eagerly at import instead of on the first call
+# - cache=True keeps the compiled code in __pycache__ between runs; without numba the loops run as plain Python
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; fall back to plain Python loops
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+    prange = range
+
+# closes are float32 rows of the packed scan matrix or plain float64 arrays; results are always float64
+_RSI_SIGS = ["f8(f4[:], i8)", "f8(f8[:], i8)"]
+_MACD_SIGS = ["UniTuple(f8, 4)(f4[:], i8, i8, i8)", "UniTuple(f8, 4)(f8[:], i8, i8, i8)"]
+_SCAN_SIG = "void(f4[:, ::1], i8[::1], f8, f8, f8[::1], f8[::1], f8[::1], f8[::1], f8[::1])"
+
+@njit(_RSI_SIGS, cache=True, boundscheck=False)
+def wilder_rsi_last(close, n):
+    """
+    Last value of ta's RSIIndicator (Wilder smoothing, EWM alpha=1/n, adjust=False, seeded at 0).
+    Caller guarantees len(close) >= n.
+    """
+    alpha = 1.0 / n
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, close.shape[0]):
+        d = close[i] - close[i - 1]
+        g = d if d > 0.0 else 0.0
+        l = -d if d < 0.0 else 0.0
+        avg_gain += alpha * (g - avg_gain)
+        avg_loss += alpha * (l - avg_loss)
+    if avg_loss == 0.0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+@njit(_MACD_SIGS, cache=True, boundscheck=False)
+def macd_cross_last(close, fast, slow, sig):
+    """
+    (macd_prev, macd_cur, signal_prev, signal_cur) matching ta's MACD: EMAs with alpha=2/(n+1)
+    seeded at close[0]; the signal EMA starts at the first MACD value with a full slow window.
+    Caller guarantees len(close) >= slow + 1.
+    """
+    a_fast = 2.0 / (fast + 1)
+    a_slow = 2.0 / (slow + 1)
+    a_sig = 2.0 / (sig + 1)
+    ema_fast = close[0]
+    ema_slow = close[0]
+    macd_prev = macd_cur = sig_prev = sig_cur = 0.0
+    for i in range(1, close.shape[0]):
+        ema_fast = a_fast * close[i] + (1.0 - a_fast) * ema_fast
+        ema_slow = a_slow * close[i] + (1.0 - a_slow) * ema_slow
+        if i < slow - 1:
+            continue
+        macd_prev, macd_cur = macd_cur, ema_fast - ema_slow
+        sig_prev = sig_cur
+        sig_cur = macd_cur if i == slow - 1 else a_sig * macd_cur + (1.0 - a_sig) * sig_cur
+    return macd_prev, macd_cur, sig_prev, sig_cur
+
+@njit(_SCAN_SIG, parallel=True, cache=True)
+def scan_indicators(closes, lengths, rsi_low, rsi_high, out_rsi, out_macd_prev, out_macd_cur, out_sig_prev, out_sig_cur):
+    """
+    RSI(14) and the last two MACD(12,26,9)/signal values for every row of a right-aligned closes matrix,
+    one row per thread. Rows with fewer than 20 (RSI) / 35 (MACD) closes are left untouched, and MACD is
+    only computed for rows whose RSI lies in [rsi_low, rsi_high].
+    closes must be a C-contiguous float32 matrix, lengths int64 and the outputs float64.
+    """
+    width = closes.shape[1]
+    for i in prange(closes.shape[0]):
+        n = lengths[i]
+        if n < 20:
+            continue
+        row = closes[i, width - n:]
+        out_rsi[i] = wilder_rsi_last(row, 14)
+        if n >= 35 and rsi_low <= out_rsi[i] <= rsi_high:
+            out_macd_prev[i], out_macd_cur[i], out_sig_prev[i], out_sig_cur[i] = macd_cross_last(row, 12, 26, 9)
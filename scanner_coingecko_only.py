@@ -1,8 +1,13 @@
 # scanner_coingecko_only.py
 import os
-import time
+import asyncio
 import requests
+import orjson
+import numpy as np
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
+from telegram_batch import send_all_telegram
 
 load_dotenv()
 
@@ -13,6 +18,16 @@ if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
 TELEGRAM_CHAT_ID = int(TELEGRAM_CHAT_ID)
 
 TELEGRAM_API_BASE = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
+
+# Shared HTTP session: keeps TLS connections to CoinGecko warm across calls
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504]),
+))
+SESSION.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip"})
+
 COINGECKO_MARKETS = "https://api.coingecko.com/api/v3/coins/markets"
 
 # Config
@@ -20,15 +35,7 @@ TOP_N = 100
 MIN_24H_PCT = 15.0   # alert if 24h price change >= this percent
 MIN_VOLUME_USD = 100000   # minimum 24h volume to avoid tiny illiquid coins
 SLEEP_BETWEEN_RUNS = 300  # seconds between full scans
-
-def send_telegram(text):
-    try:
-        r = requests.post(TELEGRAM_API_BASE + "/sendMessage", data={"chat_id": TELEGRAM_CHAT_ID, "text": text}, timeout=10)
-        r.raise_for_status()
-        return True
-    except Exception as e:
-        print("Telegram send error:", e)
-        return False
+TELEGRAM_CONCURRENCY = 4  # alert messages in flight at once
 
 def fetch_top_markets(limit=TOP_N):
     params = {
@@ -38,34 +45,35 @@ def fetch_top_markets(limit=TOP_N):
         "page": 1,
         "price_change_percentage": "24h"
     }
-    r = requests.get(COINGECKO_MARKETS, params=params, timeout=15)
+    r = SESSION.get(COINGECKO_MARKETS, params=params, timeout=15)
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
 def scan_once():
     print("Fetching CoinGecko top markets...")
     markets = fetch_top_markets(TOP_N)
-    alerts = []
-    for m in markets:
+    pcts = np.fromiter((m.get("price_change_percentage_24h") or 0.0 for m in markets), dtype=np.float64, count=len(markets))
+    vols = np.fromiter((m.get("total_volume") or 0.0 for m in markets), dtype=np.float64, count=len(markets))
+    candidates = [markets[i] for i in np.flatnonzero((pcts >= MIN_24H_PCT) & (vols >= MIN_VOLUME_USD))]
+    to_send = []  # (coin_id, text), sent together after the loop
+    for m in candidates:
         try:
             pct = m.get("price_change_percentage_24h") or 0.0
             vol = m.get("total_volume") or 0.0
-            if pct >= MIN_24H_PCT and vol >= MIN_VOLUME_USD:
-                text = (
-                    f"COINGECKO ALERT: {m.get('symbol','').upper()} / {m.get('name')}\n"
-                    f"Price: ${m.get('current_price')}\n"
-                    f"24h Change: {pct:.2f}%\n"
-                    f"24h Volume: ${vol:,.0f}\n"
-                    f"MarketCap: ${m.get('market_cap',0):,}\n"
-                    f"Link: https://www.coingecko.com/en/coins/{m.get('id')}"
-                )
-                print("ALERT ->", m.get('symbol'), pct, "% vol:", vol)
-                ok = send_telegram(text)
-                if ok:
-                    alerts.append(m.get('id'))
+            text = (
+                f"COINGECKO ALERT: {m.get('symbol','').upper()} / {m.get('name')}\n"
+                f"Price: ${m.get('current_price')}\n"
+                f"24h Change: {pct:.2f}%\n"
+                f"24h Volume: ${vol:,.0f}\n"
+                f"MarketCap: ${m.get('market_cap',0):,}\n"
+                f"Link: https://www.coingecko.com/en/coins/{m.get('id')}"
+            )
+            print("ALERT ->", m.get('symbol'), pct, "% vol:", vol)
+            to_send.append((m.get('id'), text))
         except Exception as e:
             print("entry error", e)
-    return alerts
+    results = asyncio.run(send_all_telegram(TELEGRAM_API_BASE, TELEGRAM_CHAT_ID, [text for _, text in to_send], TELEGRAM_CONCURRENCY))
+    return [coin_id for (coin_id, _), ok in zip(to_send, results) if ok]
 
 if __name__ == "__main__":
     alerts = scan_once()
@@ -1,10 +1,15 @@
 # scanner_coingecko_sqlite.py
 import os
 import time
+import asyncio
 import sqlite3
 import requests
-from datetime import datetime, timezone, timedelta
+import orjson
+import numpy as np
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
+from telegram_batch import send_all_telegram
 
 load_dotenv()
 
@@ -21,14 +26,28 @@ MIN_24H_PCT = 15.0
 MIN_VOLUME_USD = 100000
 ALERT_DEDUP_HOURS = 6  # do not resend same coin within this window
 SLEEP_BETWEEN_RUNS = 300  # seconds
+TELEGRAM_CONCURRENCY = 4  # alert messages in flight at once
 
 TELEGRAM_API_BASE = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
 
+# Shared HTTP session: keeps TLS connections to CoinGecko warm across calls
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504]),
+))
+SESSION.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip"})
+
 # --- DB helpers
+# one connection for the life of the process; autocommit mode, explicit transactions for batched writes
+CONN = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+CONN.execute("PRAGMA journal_mode=WAL")
+CONN.execute("PRAGMA synchronous=NORMAL")
+CONN.execute("PRAGMA temp_store=MEMORY")
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
+    CONN.execute(
         """
         CREATE TABLE IF NOT EXISTS alerts (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -41,38 +60,28 @@ def init_db():
         )
         """
     )
-    conn.commit()
-    conn.close()
+    CONN.execute("CREATE INDEX IF NOT EXISTS ix_alerts_coin_time ON alerts(coin_id, alert_time DESC)")
 
-def was_alerted_recent(coin_id, hours=ALERT_DEDUP_HOURS):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cutoff = int((datetime.now(timezone.utc) - timedelta(hours=hours)).timestamp())
-    cur.execute("SELECT 1 FROM alerts WHERE coin_id = ? AND alert_time >= ? LIMIT 1", (coin_id, cutoff))
-    found = cur.fetchone() is not None
-    conn.close()
-    return found
-
-def record_alert(coin_id, symbol, alert_type, pct, volume):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    now_ts = int(datetime.now(timezone.utc).timestamp())
-    cur.execute(
-        "INSERT INTO alerts (coin_id, symbol, alert_type, alert_time, pct, volume) VALUES (?, ?, ?, ?, ?, ?)",
-        (coin_id, symbol, alert_type, now_ts, pct, volume)
-    )
-    conn.commit()
-    conn.close()
+def load_recent_alert_ids(now_ts, hours=ALERT_DEDUP_HOURS):
+    """coin_ids alerted within `hours` before the unix time now_ts, fetched in one query per scan"""
+    cutoff = now_ts - hours * 3600
+    cur = CONN.execute("SELECT DISTINCT coin_id FROM alerts WHERE alert_time >= ?", (cutoff,))
+    return {row[0] for row in cur}
 
-# --- Telegram
-def send_telegram(text):
+def record_alerts(rows):
+    """rows: (coin_id, symbol, alert_type, alert_time, pct, volume) tuples, written in one transaction"""
+    if not rows:
+        return
+    CONN.execute("BEGIN IMMEDIATE")
     try:
-        r = requests.post(TELEGRAM_API_BASE + "/sendMessage", data={"chat_id": TELEGRAM_CHAT_ID, "text": text}, timeout=15)
-        r.raise_for_status()
-        return True
-    except Exception as e:
-        print("Telegram send error:", e)
-        return False
+        CONN.executemany(
+            "INSERT INTO alerts (coin_id, symbol, alert_type, alert_time, pct, volume) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        CONN.execute("COMMIT")
+    except Exception:
+        CONN.execute("ROLLBACK")
+        raise
 
 # --- CoinGecko
 def fetch_top_markets(limit=TOP_N):
@@ -83,41 +92,55 @@ def fetch_top_markets(limit=TOP_N):
         "page": 1,
         "price_change_percentage": "24h"
     }
-    r = requests.get(COINGECKO_MARKETS, params=params, timeout=15)
+    r = SESSION.get(COINGECKO_MARKETS, params=params, timeout=15)
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
 def scan_once():
-    print(f"[{datetime.now().isoformat()}] Fetching CoinGecko top {TOP_N} markets...")
+    now_ts = int(time.time())  # one time reference for the whole scan
+    scan_started = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now_ts))
+    print(f"[{scan_started}] Fetching CoinGecko top {TOP_N} markets...")
     markets = fetch_top_markets(TOP_N)
-    alerts = []
-    for m in markets:
+    recent = load_recent_alert_ids(now_ts)
+    pcts = np.fromiter((m.get("price_change_percentage_24h") or 0.0 for m in markets), dtype=np.float64, count=len(markets))
+    vols = np.fromiter((m.get("total_volume") or 0.0 for m in markets), dtype=np.float64, count=len(markets))
+    candidates = [markets[i] for i in np.flatnonzero((pcts >= MIN_24H_PCT) & (vols >= MIN_VOLUME_USD))]
+    to_send = []  # (row, text); rows are (coin_id, symbol, alert_type, alert_time, pct, volume)
+    for m in candidates:
         try:
             coin_id = m.get("id")
             symbol = (m.get("symbol") or "").upper()
             pct = float(m.get("price_change_percentage_24h") or 0.0)
             vol = float(m.get("total_volume") or 0.0)
-            if pct >= MIN_24H_PCT and vol >= MIN_VOLUME_USD:
-                if was_alerted_recent(coin_id):
-                    # skip duplicate
-                    print("SKIP (recent):", symbol, pct, "% vol:", vol)
-                    continue
-                text = (
-                    f"COINGECKO ALERT: {symbol} / {m.get('name')}\n"
-                    f"Price: ${m.get('current_price')}\n"
-                    f"24h Change: {pct:.2f}%\n"
-                    f"24h Volume: ${vol:,.0f}\n"
-                    f"MarketCap: ${m.get('market_cap',0):,}\n"
-                    f"Link: https://www.coingecko.com/en/coins/{coin_id}"
-                )
-                ok = send_telegram(text)
-                if ok:
-                    record_alert(coin_id, symbol, "24h_pct", pct, vol)
-                    alerts.append(coin_id)
-                    print("ALERT SENT:", symbol, pct, "% vol:", vol)
+            if coin_id in recent:
+                # skip duplicate
+                print("SKIP (recent):", symbol, pct, "% vol:", vol)
+                continue
+            text = (
+                f"COINGECKO ALERT: {symbol} / {m.get('name')}\n"
+                f"Price: ${m.get('current_price')}\n"
+                f"24h Change: {pct:.2f}%\n"
+                f"24h Volume: ${vol:,.0f}\n"
+                f"MarketCap: ${m.get('market_cap',0):,}\n"
+                f"Link: https://www.coingecko.com/en/coins/{coin_id}"
+            )
+            row = (coin_id, symbol, "24h_pct", now_ts, pct, vol)
+            to_send.append((row, text))
         except Exception as e:
             print("entry error", e)
-    print(f"[{datetime.now().isoformat()}] Done. Alerts:", alerts)
+
+    results = asyncio.run(send_all_telegram(TELEGRAM_API_BASE, TELEGRAM_CHAT_ID, [text for _, text in to_send], TELEGRAM_CONCURRENCY))
+    alerts = []
+    pending = []
+    for (row, _), ok in zip(to_send, results):
+        if ok:
+            coin_id, symbol, _, _, pct, vol = row
+            pending.append(row)
+            recent.add(coin_id)
+            alerts.append(coin_id)
+            print("ALERT SENT:", symbol, pct, "% vol:", vol)
+    record_alerts(pending)
+    print(f"[{scan_started}] Done. Alerts:", alerts)
     return alerts
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+# scanner_common.py
+# Exchange and indicator helpers shared by the ccxt scanners (scanner_mvp.py, scanner_supabase_old.py).
+# - markets cached on disk, mapped to coins through a quote -> {base: symbol} index
+# - 1m OHLCV bucketed into 15m / 1h bars with NumPy; RSI from the numba kernel in indicators_numba.py
+
+import os
+import time
+import json
+import numpy as np
+from indicators_numba import wilder_rsi_last
+
+# Strategy config (tune as needed)
+VOL_GAIN_WINDOW = 10
+VOL_GAIN_THRESHOLD_PCT = 150.0
+PRICE_BREAKOUT_LOOKBACK = 20
+PRICE_BREAKOUT_PCT = 1.5
+RSI_TAIL = 60  # closes fed to RSI; only the last value is used, so older bars are skipped
+OHLCV_LIMIT = 500
+MS_15M = 15 * 60_000
+MS_1H = 60 * 60_000
+MARKETS_TTL = 3600  # seconds to reuse cached exchange markets
+MARKETS_CACHE_PATH = "markets_{exchange}_common.json"  # the HTTP scanner owns markets_<exchange>.json
+QUOTE_PREFERENCE = ("USDT", "BUSD", "USD")  # first listed quote wins when mapping coins to markets
+
+async def get_markets(exchange, ttl=MARKETS_TTL):
+    """
+    Exchange markets cached on disk (markets_<exchange>_common.json) for `ttl` seconds.
+    Cached markets are installed on the exchange so ccxt doesn't re-download them on first fetch.
+    """
+    now = time.time()
+    path = MARKETS_CACHE_PATH.format(exchange=exchange.id)
+    markets = None
+    if os.path.exists(path) and now - os.path.getmtime(path) < ttl:
+        try:
+            with open(path) as fh:
+                markets = json.load(fh)
+        except (OSError, ValueError) as e:
+            print("markets cache read error:", e, flush=True)
+            markets = None
+    if markets is not None:
+        exchange.set_markets(markets)
+        return markets
+
+    markets = await exchange.load_markets(reload=True)
+    try:
+        with open(path + ".tmp", "w") as fh:
+            json.dump(markets, fh)
+        os.replace(path + ".tmp", path)
+    except (OSError, TypeError, ValueError) as e:
+        print("markets cache write error:", e, flush=True)
+    return markets
+
+def build_symbol_index(markets):
+    """quote -> {base: market symbol} for active spot-style BASE/QUOTE markets"""
+    index = {}
+    for quote in QUOTE_PREFERENCE:
+        suffix = "/" + quote
+        index[quote] = {
+            m.split("/")[0]: m
+            for m in markets
+            if m.endswith(suffix) and markets[m].get("active") is not False
+        }
+    return index
+
+def map_to_exchange_symbols(symbol_index, coin_list):
+    mapped = []
+    for coin in coin_list:
+        sym = (coin.get("symbol") or "").upper()
+        for quote in QUOTE_PREFERENCE:
+            m = symbol_index[quote].get(sym)
+            if m:
+                mapped.append((coin, m))
+                break
+    return mapped
+
+async def fetch_ohlcv_for_symbol(exchange, symbol, timeframe='1m', limit=OHLCV_LIMIT):
+    try:
+        ohlcv = await exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+        if not ohlcv:
+            return None
+        return np.asarray(ohlcv, dtype=np.float64)
+    except Exception as e:
+        print("fetch_ohlcv error for", symbol, e, flush=True)
+        return None
+
+def _bucket_starts(ts, bucket_ms):
+    # index of the first bar in each time bucket (ts sorted, in ms); empty buckets are skipped like resample().dropna()
+    bucket = ts // bucket_ms
+    return np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+
+def rsi_last(close, window=14):
+    """
+    Last value of ta's RSIIndicator (Wilder smoothing, EWM alpha=1/window, adjust=False,
+    seeded at 0 like ta), via the shared numba kernel. Returns None when there are fewer than `window` closes.
+    """
+    if len(close) < window:
+        return None
+    return float(wilder_rsi_last(np.ascontiguousarray(close, dtype=np.float64), window))
+
+def compute_indicators(ohlcv):
+    """
+    15m volume gain, breakout and 15m/1h RSI from 1m bars. Returns None when there are too few bars, or
+    when the volume or breakout threshold already fails (the RSIs are only computed for survivors).
+    """
+    ts = ohlcv[:, 0].astype(np.int64)
+    high, close, volume = ohlcv[:, 2], ohlcv[:, 4], ohlcv[:, 5]
+
+    starts_15 = _bucket_starts(ts, MS_15M)
+    starts_1h = _bucket_starts(ts, MS_1H)
+    if len(starts_15) < VOL_GAIN_WINDOW + 2 or len(starts_1h) < 2:
+        return None
+
+    # 15m / 1h bars: high=max, close=last, volume=sum per bucket
+    high_15 = np.maximum.reduceat(high, starts_15)
+    close_15 = close[np.append(starts_15[1:], len(ts)) - 1]
+    vol_15 = np.add.reduceat(volume, starts_15)
+
+    avg_vol = vol_15[-(VOL_GAIN_WINDOW+1):-1].mean()
+    vol_gain_pct = (vol_15[-1] / avg_vol * 100) if avg_vol > 0 else 0
+
+    last_close = close_15[-1]
+    recent_section = high_15[-(PRICE_BREAKOUT_LOOKBACK+1):-1]
+    recent_high = recent_section.max() if recent_section.size else float('nan')
+    breakout_pct = ((last_close - recent_high) / recent_high * 100) if recent_high and recent_high > 0 else 0
+    if vol_gain_pct < VOL_GAIN_THRESHOLD_PCT or breakout_pct < PRICE_BREAKOUT_PCT:
+        return None
+
+    close_1h = close[np.append(starts_1h[1:], len(ts)) - 1]
+    return {
+        "vol_gain_pct": float(vol_gain_pct),
+        "breakout_pct": float(breakout_pct),
+        "rsi_15": rsi_last(close_15[-RSI_TAIL:], 14),
+        "rsi_1h": rsi_last(close_1h[-RSI_TAIL:], 14),
+        "last_close": float(last_close),
+        "recent_high": float(recent_high) if not np.isnan(recent_high) else None
+    }
@@ -5,17 +5,26 @@
 # - uses exchange OHLCV when available; if exchange OHLCV is missing or too short, falls back to CoinGecko market_chart -> builds OHLCV
 # - writes deduped alerts to Supabase REST and sends Telegram messages
 # - dedupe coin_id format: "<exchange>:<base>" for exchange-sourced; fallback uses same coin_id if exchange provided
+# - WATCH_OHLCV=1 runs a long-lived variant that keeps bars up to date over ccxt.pro websockets and re-scans every WATCH_SCAN_INTERVAL seconds
 
 import os
 import time
-import requests
-import ccxt
-import pandas as pd
+import gzip
+import asyncio
+from collections import deque, defaultdict
+from dataclasses import dataclass
+import aiohttp
+import orjson
+import ccxt.async_support as accxt
+import numpy as np
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
+from indicators_numba import scan_indicators
 
-from ta.momentum import RSIIndicator
-from ta.trend import MACD
+try:
+    import ccxt.pro as ccxtpro
+except ImportError:  # older ccxt without the bundled pro module; only WATCH_OHLCV mode needs it
+    ccxtpro = None
 
 load_dotenv()
 
@@ -25,6 +34,8 @@ TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 EXCHANGES = os.getenv("EXCHANGES", "binance")  # comma-separated e.g. "binance,bitget,bybit,okx,gate"
+WATCH_OHLCV = os.getenv("WATCH_OHLCV", "0") == "1"  # stream OHLCV over websockets instead of one REST scan
+WATCH_SCAN_INTERVAL = int(os.getenv("WATCH_SCAN_INTERVAL", "60"))  # seconds between scans of the streamed bars
 
 if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID or not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
     raise SystemExit("Set TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, SUPABASE_URL, SUPABASE_SERVICE_KEY in environment or repo variables")
@@ -32,6 +43,9 @@ if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID or not SUPABASE_URL or not SUP
 TELEGRAM_CHAT_ID = int(TELEGRAM_CHAT_ID)
 TELEGRAM_API_BASE = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
 REST_BASE = SUPABASE_URL.rstrip("/") + "/rest/v1"
+# Each mode opens one aiohttp session for all its HTTP (scan_once, or watch_forever in watch mode).
+# Supabase auth is passed per request (HEADERS) rather than set on the session, so the service key
+# is never sent to Telegram or CoinGecko.
 HEADERS = {
     "apikey": SUPABASE_SERVICE_KEY,
     "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
@@ -41,258 +55,445 @@ HEADERS = {
 
 # ----- Scanner tuning (changeable)
 DEDUPE_HOURS = 6
-SLEEP_BETWEEN_SYMBOLS = 0.4
+DEDUPE_IN_CHUNK = 200            # coin_ids per in.() dedupe query, keeps each URL well under 8KB
+OHLCV_CONCURRENCY = 8           # in-flight OHLCV requests per exchange; ccxt's rate limiter paces them
+MIN_RATE_LIMIT_MS = int(os.getenv("MIN_RATE_LIMIT_MS", "0"))  # floor for ccxt's per-exchange rateLimit (ms between requests)
 MIN_VOLUME_USD = 10000           # baseline liquidity for candidate markets (exchange-provided or estimate)
+# skip markets whose ticker 24h % change is smaller than this in absolute value; 0 disables it, since a
+# 3-15% 15m breakout can sit inside a flat day and would be dropped by a tighter setting
+MIN_ABS_24H_PCT = float(os.getenv("MIN_ABS_24H_PCT", "0"))
 OHLCV_LIMIT_1H = 72              # hours of 1h bars
-OHLCV_LIMIT_15M = 8              # 15m bars
 VOL_CHANGE_THRESHOLD_PCT = 150.0
 PRICE_MIN_PCT = 3.0
 PRICE_MAX_PCT = 15.0
 RSI_LOW = 50.0
 RSI_HIGH = 70.0
 REQUEST_TIMEOUT = 15
+HTTP_CONCURRENCY = 20            # open connections in the shared aiohttp session (Supabase, Telegram, CoinGecko)
+QUOTE_PRIORITY = {"USDT": 0, "BUSD": 1, "USD": 2}  # one market per base per exchange, preferred quote first
+MARKETS_TTL = 6 * 3600           # seconds to reuse markets_<exchange>.json before calling load_markets again
+MARKETS_CACHE_PATH = "markets_{exchange}.json"
+CG_SYMBOL_MAP_TTL = 24 * 3600    # seconds to reuse the CoinGecko symbol -> ids map on disk
+CG_SYMBOL_MAP_PATH = "cg_symbol_map.json.gz"
 
 # ---------- Supabase REST helpers ----------
-def was_alerted_recent(coin_id, hours=DEDUPE_HOURS):
-    cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+async def get_json(http, url, params=None, headers=None, attempts=3, backoff=0.3):
+    """
+    GET and decode JSON over the shared session, retrying 429/5xx and dropped connections with
+    exponential backoff (what the urllib3 Retry adapter did for the old requests Session).
+    """
+    for attempt in range(attempts):
+        try:
+            async with http.get(url, params=params, headers=headers) as r:
+                if r.status in RETRY_STATUSES and attempt < attempts - 1:
+                    await asyncio.sleep(backoff * 2 ** attempt)
+                    continue
+                r.raise_for_status()
+                return orjson.loads(await r.read())
+        except aiohttp.ClientConnectionError:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(backoff * 2 ** attempt)
+
+def dedupe_cutoff(hours=DEDUPE_HOURS):
+    """ISO timestamp `hours` ago; computed once per scan and passed to the lookups below"""
+    return (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+
+async def load_recent_alert_ids(http, cutoff=None, coin_ids=None):
+    """
+    coin_ids alerted since `cutoff` (default DEDUPE_HOURS ago), so the scan loop can dedupe in memory.
+    With `coin_ids` the lookup is limited to those ids via PostgREST in.() filters, chunked to keep
+    URLs short and sent concurrently.
+    """
+    cutoff = cutoff or dedupe_cutoff()
     url = f"{REST_BASE}/alerts"
-    params = {"coin_id": f"eq.{coin_id}", "alert_time": f"gte.{cutoff}"}
+    base_params = {"select": "coin_id", "alert_time": f"gte.{cutoff}"}
+    if coin_ids is None:
+        chunks = [base_params]
+    else:
+        ids = sorted(set(coin_ids))
+        chunks = [
+            {**base_params, "coin_id": "in.(" + ",".join(f'"{cid}"' for cid in ids[i:i + DEDUPE_IN_CHUNK]) + ")"}
+            for i in range(0, len(ids), DEDUPE_IN_CHUNK)
+        ]
     try:
-        r = requests.get(url, headers=HEADERS, params=params, timeout=REQUEST_TIMEOUT)
-        r.raise_for_status()
-        return len(r.json()) > 0
+        results = await asyncio.gather(*[get_json(http, url, params=p, headers=HEADERS) for p in chunks])
+        return {row["coin_id"] for rows in results for row in rows}
     except Exception as e:
-        print("[DB] was_alerted_recent error:", e, flush=True)
-        # if DB unreachable, assume not alerted to avoid missing alerts later
-        return False
+        print("[DB] load_recent_alert_ids error:", e, flush=True)
+        # if DB unreachable, assume nothing alerted rather than miss alerts
+        return set()
 
-def record_alert(coin_id, symbol, alert_type, pct, volume):
+async def record_alerts(http, rows):
+    """Insert many alert rows in one POST; PostgREST takes a JSON array and inserts it in one transaction"""
+    if not rows:
+        return True
     url = f"{REST_BASE}/alerts"
-    payload = {"coin_id": coin_id, "symbol": symbol, "alert_type": alert_type, "pct": pct, "volume": volume}
     try:
-        r = requests.post(url, headers=HEADERS, json=payload, timeout=REQUEST_TIMEOUT)
-        r.raise_for_status()
-        return r.json()
+        async with http.post(url, headers={**HEADERS, "Prefer": "return=minimal"}, data=orjson.dumps(rows)) as r:
+            r.raise_for_status()
+            return True
     except Exception as e:
-        print("[DB] record_alert error:", e, flush=True)
-        return None
+        print("[DB] record_alerts error:", e, flush=True)
+        return False
 
 # ---------- Telegram ----------
-def send_telegram(text):
-    try:
-        r = requests.post(TELEGRAM_API_BASE + "/sendMessage",
-                          data={"chat_id": TELEGRAM_CHAT_ID, "text": text},
-                          timeout=REQUEST_TIMEOUT)
-        r.raise_for_status()
-        return True
-    except Exception as e:
-        print("Telegram send error:", e, flush=True)
-        return False
+async def send_telegram(http, text):
+    """Post one message; 429 responses are retried after Telegram's retry_after"""
+    for attempt in range(3):
+        try:
+            async with http.post(TELEGRAM_API_BASE + "/sendMessage", headers={"Content-Type": "application/json"},
+                                 data=orjson.dumps({"chat_id": TELEGRAM_CHAT_ID, "text": text})) as r:
+                if r.status == 429:
+                    body = orjson.loads(await r.read())
+                    await asyncio.sleep((body.get("parameters") or {}).get("retry_after", 1))
+                    continue
+                if r.status >= 400:
+                    print("Telegram send error:", r.status, await r.text(), flush=True)
+                    return False
+                return True
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print("Telegram send error:", e, flush=True)
+            return False
+    return False
 
 # ---------- Exchange helpers ----------
-def build_exchange_instances():
+def exchange_config(ex_cls):
+    """
+    ccxt constructor config. ccxt builds its token bucket from rateLimit in the constructor, so the
+    MIN_RATE_LIMIT_MS floor has to go in here; the class default is read off a throwaway instance.
+    """
+    config = {"enableRateLimit": True}
+    if MIN_RATE_LIMIT_MS > 0:
+        config["rateLimit"] = max(ex_cls().rateLimit, MIN_RATE_LIMIT_MS)
+    return config
+
+def build_exchange_instances(ccxt_module=accxt):
     ex_names = [e.strip() for e in EXCHANGES.split(",") if e.strip()]
     instances = {}
     for name in ex_names:
         try:
-            ex_cls = getattr(ccxt, name)
-            instances[name] = ex_cls({"enableRateLimit": True})
+            ex_cls = getattr(ccxt_module, name)
+            instances[name] = ex_cls(exchange_config(ex_cls))
             print(f"[EXCH] Prepared instance for {name}", flush=True)
         except Exception as e:
             print(f"[EXCH] Could not prepare ccxt exchange '{name}': {e}", flush=True)
     if not instances:
-        instances["binance"] = ccxt.binance({"enableRateLimit": True})
+        instances["binance"] = ccxt_module.binance(exchange_config(ccxt_module.binance))
     return instances
 
-def build_candidates_from_exchanges(exchange_instances):
+async def load_markets_cached(ex, ttl=MARKETS_TTL):
+    """
+    ex.load_markets(), but reusing markets_<exchange>.json when younger than `ttl` seconds. Cached
+    markets are installed with set_markets so ccxt has its symbol/id indexes as usual.
+    """
+    now = time.time()
+    path = MARKETS_CACHE_PATH.format(exchange=ex.id)
+    if os.path.exists(path) and now - os.path.getmtime(path) < ttl:
+        try:
+            with open(path, "rb") as fh:
+                markets = orjson.loads(fh.read())
+            ex.set_markets(markets)
+            return markets
+        except (OSError, ValueError) as e:
+            print(f"[EXCH] markets cache read error for {ex.id}: {e}", flush=True)
+
+    markets = await ex.load_markets(reload=True)
+    try:
+        with open(path + ".tmp", "wb") as fh:
+            fh.write(orjson.dumps(markets))
+        os.replace(path + ".tmp", path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"[EXCH] markets cache write error for {ex.id}: {e}", flush=True)
+    return markets
+
+def build_market_index(markets):
+    """base -> (quote priority, market symbol, quote) for spot markets, keeping the preferred quote"""
+    base_to_market = {}
+    for m_sym, m in markets.items():
+        # ccxt already parses base/quote; futures and swaps share quotes with spot, so filter on the spot flag
+        if not m.get("spot", True):
+            continue
+        prio = QUOTE_PRIORITY.get(m.get("quote"))
+        if prio is None:
+            continue
+        base, quote = m.get("base"), m.get("quote")
+        best = base_to_market.get(base)
+        if best is None or prio < best[0]:
+            base_to_market[base] = (prio, m_sym, quote)
+    return base_to_market
+
+async def build_candidates_from_exchanges(exchange_instances):
     """
     Build candidate list from exchange markets:
-    returns list of dicts: {"exchange","market","base","quote","volume_est"}
+    returns list of dicts: {"exchange","market","base","quote","volume","pct_24h"}
     """
     candidates = []
     for name, ex in exchange_instances.items():
         try:
-            ex.load_markets()
+            markets = await load_markets_cached(ex)
         except Exception as e:
             print(f"[EXCH] Failed load_markets for {name}: {e}", flush=True)
             continue
-        for m_sym, m in ex.markets.items():
-            if "/" not in m_sym:
-                continue
-            parts = m_sym.split("/")
-            base, quote = parts[0], parts[1]
-            if quote not in ("USDT", "BUSD", "USD"):
-                continue
-            # attempt to estimate 24h volume from market info if present (best-effort)
-            vol = None
+        base_to_market = build_market_index(markets)
+        # one batched ticker call gives real 24h quote volume, so illiquid markets are dropped before any OHLCV fetch
+        tickers = {}
+        if ex.has.get("fetchTickers"):
             try:
-                info = m.get("info", {}) or {}
-                # common keys vary by exchange; try a few known ones
-                vol = info.get("quoteVolume24h") or info.get("quoteVolume") or info.get("volume") or info.get("quoteVolume24Hr") or None
-            except Exception:
-                vol = None
-            candidates.append({"exchange": name, "market": m_sym, "base": base, "quote": quote, "volume": vol})
+                tickers = await ex.fetch_tickers()
+            except Exception as e:
+                print(f"[EXCH] fetch_tickers failed for {name}: {e}", flush=True)
+        # markets without a ticker get None volume / change, which baseline_filter passes through
+        candidates.extend(
+            {"exchange": name, "market": m_sym, "base": base, "quote": quote,
+             "volume": (tickers.get(m_sym) or {}).get("quoteVolume"),
+             "pct_24h": (tickers.get(m_sym) or {}).get("percentage")}
+            for base, (_, m_sym, quote) in base_to_market.items()
+        )
     print(f"[CAND] Built {len(candidates)} exchange-sourced candidates", flush=True)
     return candidates
 
-def fetch_ohlcv(exchange, symbol, timeframe='1h', limit=100):
+async def fetch_ohlcv(exchange, symbol, timeframe='1h', limit=100):
     try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+        ohlcv = await exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
         if not ohlcv:
             return None
-        df = pd.DataFrame(ohlcv, columns=['timestamp','open','high','low','close','volume'])
-        df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
-        df.set_index('datetime', inplace=True)
-        return df[['open','high','low','close','volume']]
+        # columns: timestamp(ms), open, high, low, close, volume
+        return np.asarray(ohlcv, dtype=np.float64)
     except Exception as e:
         print(f"[EXCH] fetch_ohlcv error for {symbol} on {getattr(exchange, 'id', 'unknown')}: {e}", flush=True)
         return None
 
-# ---------- Indicators ----------
-def compute_signals(df1h, df15m):
-    results = {"vol_pct_24h": None, "price_pct_15_vs_1h": None, "rsi_1h": None, "macd_bull_cross": False, "last_close": None}
-    try:
-        if df1h is None or df1h.empty:
-            return results
-        results['last_close'] = float(df1h['close'].iloc[-1])
-    except Exception:
-        pass
-
-    # Volume % change (24h): need at least 48 1H bars
-    if df1h is not None and len(df1h) >= 48:
-        try:
-            vol_last24 = df1h['volume'].iloc[-24:].sum()
-            vol_prev24 = df1h['volume'].iloc[-48:-24].sum()
-            if vol_prev24 > 0:
-                results['vol_pct_24h'] = (vol_last24 / vol_prev24 - 1.0) * 100.0
-        except Exception:
-            results['vol_pct_24h'] = None
-
-    # Price % change (15m vs 1h)
-    if df15m is not None and not df15m.empty and df1h is not None and len(df1h) >= 2:
-        try:
-            close_15m = float(df15m['close'].iloc[-1])
-            close_1h_ago = float(df1h['close'].iloc[-2])
-            results['price_pct_15_vs_1h'] = (close_15m / close_1h_ago - 1.0) * 100.0
-        except Exception:
-            results['price_pct_15_vs_1h'] = None
-
-    # RSI (1h)
-    if df1h is not None and len(df1h) >= 20:
-        try:
-            rsi = RSIIndicator(df1h['close'], window=14).rsi()
-            results['rsi_1h'] = float(rsi.iloc[-1]) if not pd.isna(rsi.iloc[-1]) else None
-        except Exception:
-            results['rsi_1h'] = None
+MS_1H = 3600 * 1000
 
-    # MACD (1h) bullish crossover
-    if df1h is not None and len(df1h) >= 35:
-        try:
-            macd = MACD(df1h['close'], window_slow=26, window_fast=12, window_sign=9)
-            macd_line = macd.macd()
-            macd_signal = macd.macd_signal()
-            if len(macd_line) >= 2 and len(macd_signal) >= 2:
-                prev_macd = macd_line.iloc[-2]
-                prev_sig = macd_signal.iloc[-2]
-                cur_macd = macd_line.iloc[-1]
-                cur_sig = macd_signal.iloc[-1]
-                results['macd_bull_cross'] = (prev_macd < prev_sig) and (cur_macd > cur_sig)
-        except Exception:
-            results['macd_bull_cross'] = False
+def reduce_buckets(arr, bucket_ms):
+    """
+    Aggregate time-sorted OHLCV rows into `bucket_ms` bars (open=first, high=max, low=min, close=last,
+    volume=sum) keyed by the bucket each row starts in; empty buckets are not emitted.
+    """
+    key = arr[:, 0].astype(np.int64) // bucket_ms
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(key)) + 1))
+    ends = np.append(starts[1:], len(arr)) - 1
+    return np.column_stack([
+        key[starts].astype(np.float64) * bucket_ms,
+        arr[starts, 1],
+        np.maximum.reduceat(arr[:, 2], starts),
+        np.minimum.reduceat(arr[:, 3], starts),
+        arr[ends, 4],
+        np.add.reduceat(arr[:, 5], starts),
+    ])
+
+async def fetch_candidate_bars(exchange, sem, symbol):
+    """
+    1h OHLCV for one market under the exchange's semaphore. The last (still-open) 1h bar's close is the
+    latest trade price, which is what the 15m close was used for, so no separate 15m request is made.
+    """
+    async with sem:
+        return await fetch_ohlcv(exchange, symbol, timeframe='1h', limit=OHLCV_LIMIT_1H)
 
-    return results
+# ---------- Indicators ----------
+@dataclass
+class IndicatorState:
+    """
+    Running RSI(14) / MACD(12,26,9) over a market's closed 1h bars, for the websocket mode.
+    Same recurrences and seeding as wilder_rsi_last / macd_cross_last, so each new bar is O(1)
+    instead of a pass over the whole buffer.
+    """
+    last_ts: float = 0.0
+    count: int = 0
+    prev_close: float = 0.0
+    avg_gain: float = 0.0
+    avg_loss: float = 0.0
+    ema_fast: float = 0.0
+    ema_slow: float = 0.0
+    macd: float = 0.0
+    signal: float = 0.0
+
+    def _step(self, close):
+        """(avg_gain, avg_loss, ema_fast, ema_slow, macd, signal) after one more close, without committing it"""
+        if self.count == 0:
+            return 0.0, 0.0, close, close, 0.0, 0.0
+        d = close - self.prev_close
+        avg_gain = self.avg_gain + (max(d, 0.0) - self.avg_gain) / 14
+        avg_loss = self.avg_loss + (max(-d, 0.0) - self.avg_loss) / 14
+        ema_fast = self.ema_fast + 2.0 / 13 * (close - self.ema_fast)
+        ema_slow = self.ema_slow + 2.0 / 27 * (close - self.ema_slow)
+        macd, signal = self.macd, self.signal
+        if self.count >= 25:  # this close is index >= slow - 1: MACD defined, signal seeded on the first one
+            macd = ema_fast - ema_slow
+            signal = macd if self.count == 25 else signal + 2.0 / 10 * (macd - signal)
+        return avg_gain, avg_loss, ema_fast, ema_slow, macd, signal
+
+    def sync(self, arr1h):
+        """Fold in every closed bar (all but the last, still-open one) newer than last_ts"""
+        for ts, close in arr1h[:-1, [0, 4]]:
+            if ts > self.last_ts:
+                (self.avg_gain, self.avg_loss, self.ema_fast, self.ema_slow,
+                 self.macd, self.signal) = self._step(close)
+                self.prev_close = close
+                self.last_ts = ts
+                self.count += 1
+
+    def peek(self, close):
+        """(rsi, macd_prev, macd_cur, signal_prev, signal_cur) with `close` as the current bar"""
+        avg_gain, avg_loss, _, _, macd, signal = self._step(close)
+        rsi = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        return rsi, self.macd, macd, self.signal, signal
+
+def pack_column(arrs, col, dtype=np.float32):
+    """Right-align one column of each OHLCV array into a NaN-padded (len(arrs), max length) matrix"""
+    width = max(len(a) for a in arrs)
+    out = np.full((len(arrs), width), np.nan, dtype=dtype)
+    for i, a in enumerate(arrs):
+        out[i, width - len(a):] = a[:, col]
+    return out
+
+def compute_signals_batch(arrs1h, states):
+    """
+    Signals for many markets at once from 1h OHLCV arrays whose last bar is the open one. Closes and
+    volumes are packed into float32 matrices; vectorised volume/price filters build a mask, and the
+    numba kernel runs RSI (then MACD) only for masked rows. Rows with an IndicatorState use its running
+    values instead. Returns one dict per market; a metric is None when skipped or short of bars.
+    """
+    n = len(arrs1h)
+    closes = pack_column(arrs1h, 4)
+    volumes = pack_column(arrs1h, 5)
+    lengths = np.fromiter((len(a) for a in arrs1h), dtype=np.int64, count=n)
+    width = closes.shape[1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Volume % change (24h): need at least 48 1H bars
+        vol_pct = np.full(n, np.nan)
+        if width >= 48:
+            vol_last24 = volumes[:, -24:].sum(axis=1)
+            vol_prev24 = volumes[:, -48:-24].sum(axis=1)
+            vol_pct = np.where((lengths >= 48) & (vol_prev24 > 0), (vol_last24 / vol_prev24 - 1.0) * 100.0, np.nan)
+
+        # Price % change (15m vs 1h): latest price (open bar's close) against the previous 1h close
+        price_pct = np.full(n, np.nan)
+        if width >= 2:
+            close_1h_ago = closes[:, -2]
+            price_pct = np.where((lengths >= 2) & (close_1h_ago > 0), (closes[:, -1] / close_1h_ago - 1.0) * 100.0, np.nan)
+
+    # NaN compares False, so markets missing either metric fail the screen too
+    screened = (vol_pct >= VOL_CHANGE_THRESHOLD_PCT) & (price_pct >= PRICE_MIN_PCT) & (price_pct <= PRICE_MAX_PCT)
+
+    # RSI / MACD (1h): one parallel kernel over the screened rows without an IndicatorState
+    rsi, macd_prev, macd_cur, sig_prev, sig_cur = (np.full(n, np.nan) for _ in range(5))
+    has_state = np.fromiter((st is not None for st in states), dtype=bool, count=n)
+    # the kernel is compiled for exactly these dtypes/layouts (C-contiguous float32 closes, int64 lengths)
+    scan_indicators(np.ascontiguousarray(closes, dtype=np.float32),
+                    np.ascontiguousarray(np.where(screened & ~has_state, lengths, 0), dtype=np.int64),
+                    float(RSI_LOW), float(RSI_HIGH), rsi, macd_prev, macd_cur, sig_prev, sig_cur)
+    for i in np.flatnonzero(screened & has_state & (lengths >= 20)):
+        rsi[i], macd_prev[i], macd_cur[i], sig_prev[i], sig_cur[i] = states[i].peek(arrs1h[i][-1, 4])
+    macd_cross = (lengths >= 35) & (macd_prev < sig_prev) & (macd_cur > sig_cur)
+
+    def opt(x):
+        return None if np.isnan(x) else float(x)
+
+    return [
+        {"vol_pct_24h": opt(vol_pct[i]), "price_pct_15_vs_1h": opt(price_pct[i]), "rsi_1h": opt(rsi[i]),
+         "macd_bull_cross": bool(macd_cross[i]), "last_close": float(arrs1h[i][-1, 4])}
+        for i in range(n)
+    ]
 
 # ------------------ CoinGecko fallback helpers ------------------
 _CG_SYMBOL_MAP = None
 
-def build_coingecko_symbol_map():
+async def build_coingecko_symbol_map(http):
     global _CG_SYMBOL_MAP
     if _CG_SYMBOL_MAP is not None:
         return _CG_SYMBOL_MAP
+    path = CG_SYMBOL_MAP_PATH
+    if os.path.exists(path) and time.time() - os.path.getmtime(path) < CG_SYMBOL_MAP_TTL:
+        try:
+            with gzip.open(path, "rb") as fh:
+                _CG_SYMBOL_MAP = orjson.loads(fh.read())
+            return _CG_SYMBOL_MAP
+        except (OSError, ValueError) as e:
+            print("[CG] symbol map cache read error:", e, flush=True)
     try:
-        r = requests.get("https://api.coingecko.com/api/v3/coins/list", timeout=REQUEST_TIMEOUT)
-        r.raise_for_status()
-        data = r.json()
-        mm = {}
+        data = await get_json(http, "https://api.coingecko.com/api/v3/coins/list")
+        mm = defaultdict(list)
         for item in data:
             sym = (item.get("symbol") or "").upper()
-            if not sym:
-                continue
-            mm.setdefault(sym, []).append(item.get("id"))
-        _CG_SYMBOL_MAP = mm
+            if sym:
+                mm[sym].append(item.get("id"))
+        _CG_SYMBOL_MAP = dict(mm)
         print(f"[CG] Built coin symbol map entries: {len(mm)}", flush=True)
     except Exception as e:
         print("[CG] Error building symbol map:", e, flush=True)
         _CG_SYMBOL_MAP = {}
+        return _CG_SYMBOL_MAP
+    try:
+        with gzip.open(path + ".tmp", "wb") as fh:
+            fh.write(orjson.dumps(_CG_SYMBOL_MAP))
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print("[CG] symbol map cache write error:", e, flush=True)
     return _CG_SYMBOL_MAP
 
-def get_coingecko_id_for_symbol(symbol):
-    if not symbol:
-        return None
-    mm = build_coingecko_symbol_map()
-    return (mm.get(symbol.upper()) or [None])[0]
-
-def fetch_coingecko_market_chart(coin_id, days=3):
+async def fetch_coingecko_market_chart(http, coin_id, days=3):
     try:
         url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
         params = {"vs_currency": "usd", "days": days, "interval": "hourly"}
-        r = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
-        r.raise_for_status()
-        return r.json()
+        return await get_json(http, url, params=params)
     except Exception as e:
         print(f"[CG] market_chart error for {coin_id}: {e}", flush=True)
         return None
 
-def build_ohlcv_from_coingecko(coin_id):
-    data = fetch_coingecko_market_chart(coin_id, days=3)
+def _ffill_onto(ts, src):
+    """Values of the time-sorted (ts, value) pairs in `src` carried forward onto `ts`; NaN before the first one"""
+    if len(src) == 0:
+        return np.full(len(ts), np.nan)
+    idx = np.searchsorted(src[:, 0], ts, side="right") - 1
+    return np.where(idx >= 0, src[np.maximum(idx, 0), 1], np.nan)
+
+async def build_ohlcv_from_coingecko(http, coin_id):
+    data = await fetch_coingecko_market_chart(http, coin_id, days=3)
     if not data:
-        data = fetch_coingecko_market_chart(coin_id, days=2)
+        data = await fetch_coingecko_market_chart(http, coin_id, days=2)
     if not data:
-        return None, None
+        return None
 
     prices = data.get("prices") or []
     volumes = data.get("total_volumes") or []
     if not prices:
-        return None, None
+        return None
 
     try:
-        dfp = pd.DataFrame(prices, columns=["ts","price"])
-        dfp["datetime"] = pd.to_datetime(dfp["ts"], unit='ms', utc=True)
-        dfp.set_index("datetime", inplace=True)
-        dfp = dfp.drop(columns=["ts"])
-        dfv = pd.DataFrame(volumes, columns=["ts","volume"])
-        dfv["datetime"] = pd.to_datetime(dfv["ts"], unit='ms', utc=True)
-        dfv.set_index("datetime", inplace=True)
-        dfv = dfv.drop(columns=["ts"])
-        df = dfp.join(dfv, how="outer").ffill().dropna()
-        df1h = pd.DataFrame()
-        df1h['open'] = df['price'].resample('1H').first()
-        df1h['high'] = df['price'].resample('1H').max()
-        df1h['low'] = df['price'].resample('1H').min()
-        df1h['close'] = df['price'].resample('1H').last()
-        df1h['volume'] = df['volume'].resample('1H').sum()
-        df1h = df1h.dropna()
-        df15m = pd.DataFrame()
-        df15m['open'] = df['price'].resample('15T').first()
-        df15m['high'] = df['price'].resample('15T').max()
-        df15m['low'] = df['price'].resample('15T').min()
-        df15m['close'] = df['price'].resample('15T').last()
-        df15m['volume'] = df['volume'].resample('15T').sum()
-        df15m = df15m.dropna()
-        return df1h, df15m
+        p = np.asarray(prices, dtype=np.float64).reshape(-1, 2)
+        v = np.asarray(volumes, dtype=np.float64).reshape(-1, 2)
+        # outer join on timestamp, forward-fill both series, drop rows before either has a value
+        ts = np.union1d(p[:, 0], v[:, 0])
+        price = _ffill_onto(ts, p)
+        volume = _ffill_onto(ts, v)
+        ok = ~(np.isnan(price) | np.isnan(volume))
+        if not ok.any():
+            return np.empty((0, 6))
+        ts, price, volume = ts[ok], price[ok], volume[ok]
+        ticks = np.column_stack([ts, price, price, price, price, volume])
+        return reduce_buckets(ticks, MS_1H)
     except Exception as e:
         print("[CG] build_ohlcv_from_coingecko error:", e, flush=True)
-        return None, None
+        return None
 
 # ---------- Main scanning logic ----------
-def scan_once():
-    print(f"[SCAN] Starting scan {datetime.now(timezone.utc).isoformat()}", flush=True)
-    exch_instances = build_exchange_instances()
-    candidates = build_candidates_from_exchanges(exch_instances)
+async def scan_once():
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=HTTP_CONCURRENCY)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as http:
+        return await run_scan(http)
 
-    # baseline filter
+def baseline_filter(candidates):
     filtered = []
     for c in candidates:
+        pct = c.get("pct_24h")
+        if MIN_ABS_24H_PCT and pct is not None and abs(pct) < MIN_ABS_24H_PCT:
+            continue
         vol = c.get("volume")
         if vol is None:
             filtered.append(c)
@@ -304,56 +505,96 @@ def scan_once():
         except Exception:
             filtered.append(c)
     print(f"[SCAN] Candidates after baseline filter: {len(filtered)}", flush=True)
+    return filtered
+
+async def fetch_all_bars(exch_instances, filtered):
+    """1h bars (or None / an exception) per candidate: all markets at once, bounded per exchange"""
+    sems = {name: asyncio.Semaphore(OHLCV_CONCURRENCY) for name in exch_instances}
+    return await asyncio.gather(
+        *[fetch_candidate_bars(exch_instances[c['exchange']], sems[c['exchange']], c['market']) for c in filtered],
+        return_exceptions=True,
+    )
 
-    alerts_sent = []
-    for c in filtered:
+async def run_scan(http):
+    print(f"[SCAN] Starting scan {datetime.now(timezone.utc).isoformat()}", flush=True)
+    exch_instances = build_exchange_instances()
+    try:
+        filtered = baseline_filter(await build_candidates_from_exchanges(exch_instances))
+        # dedupe lookup for just these markets, overlapped with the OHLCV fan-out
+        recent_ids, bars = await asyncio.gather(
+            load_recent_alert_ids(http, dedupe_cutoff(), [f"{c['exchange']}:{c['base']}" for c in filtered]),
+            fetch_all_bars(exch_instances, filtered),
+        )
+    finally:
+        await asyncio.gather(*[ex.close() for ex in exch_instances.values()], return_exceptions=True)
+    return await evaluate_candidates(http, filtered, bars, recent_ids)
+
+async def evaluate_candidates(http, filtered, bars, recent_ids, states=None):
+    """
+    Apply the filters to each candidate's bars (CoinGecko fallback if short), send alerts, record delivered ones.
+    `states` optionally gives an IndicatorState per candidate (websocket mode).
+    """
+    states = states or [None] * len(filtered)
+
+    # CoinGecko ids for the bases that will need the fallback, resolved against the symbol map once
+    short_bases = {c['base'] for c, res in zip(filtered, bars)
+                   if c['base'] and not isinstance(res, Exception) and (res is None or len(res) < 48)}
+    base_to_cgid = {}
+    if short_bases:
+        mm = await build_coingecko_symbol_map(http)
+        base_to_cgid = {b: (mm.get(b.upper()) or [None])[0] for b in short_bases}
+
+    ready = []  # (candidate, arr1h, state, used_fallback) with bars to evaluate
+    for c, res, state in zip(filtered, bars, states):
         ex_name = c['exchange']
         symbol = c['market']
         base = c['base']
-        exchange = exch_instances.get(ex_name)
-        if exchange is None:
+        if isinstance(res, Exception):
+            print(f"[SCAN] OHLCV task error for {symbol}@{ex_name}: {res}", flush=True)
             continue
-        time.sleep(SLEEP_BETWEEN_SYMBOLS)
-
-        # try exchange OHLCV
-        df1h = fetch_ohlcv(exchange, symbol, timeframe='1h', limit=OHLCV_LIMIT_1H)
-        df15m = fetch_ohlcv(exchange, symbol, timeframe='15m', limit=OHLCV_LIMIT_15M)
+        arr1h = res
 
         used_fallback = False
         need_fallback = False
 
-        if df1h is None or df15m is None:
+        if arr1h is None:
             need_fallback = True
         else:
             # fallback if insufficient bars for vol or MACD
-            if len(df1h) < 48 or len(df1h) < 35:
+            if len(arr1h) < 48 or len(arr1h) < 35:
                 need_fallback = True
 
         if need_fallback:
-            cg_id = get_coingecko_id_for_symbol(base)
+            cg_id = base_to_cgid.get(base)
             if cg_id:
                 print(f"[CG] Trying fallback for {base} -> {cg_id}", flush=True)
-                cg_df1h, cg_df15m = build_ohlcv_from_coingecko(cg_id)
-                if cg_df1h is not None and cg_df15m is not None:
-                    if df1h is None or df1h.empty:
-                        df1h = cg_df1h
-                    if df15m is None or df15m.empty:
-                        df15m = cg_df15m
+                cg_arr1h = await build_ohlcv_from_coingecko(http, cg_id)
+                if cg_arr1h is not None and len(cg_arr1h):
+                    if arr1h is None or len(arr1h) == 0:
+                        arr1h = cg_arr1h
                     used_fallback = True
                 else:
                     print(f"[CG] Fallback failed for {cg_id}", flush=True)
             else:
                 print(f"[CG] No CoinGecko id found for base {base}", flush=True)
 
-        if df1h is None or df15m is None:
+        if arr1h is None or len(arr1h) == 0:
             print(f"[SCAN] Skipping {symbol}@{ex_name}: missing OHLCV after fallback", flush=True)
             continue
+        ready.append((c, arr1h, None if used_fallback else state, used_fallback))
 
-        sig = compute_signals(df1h, df15m)
-        if sig['vol_pct_24h'] is None or sig['price_pct_15_vs_1h'] is None or sig['rsi_1h'] is None:
+    sigs = compute_signals_batch([r[1] for r in ready], [r[2] for r in ready]) if ready else []
+
+    to_send = []
+    for (c, _, _, used_fallback), sig in zip(ready, sigs):
+        ex_name = c['exchange']
+        symbol = c['market']
+        base = c['base']
+        if sig['vol_pct_24h'] is None or sig['price_pct_15_vs_1h'] is None:
             print(f"[SCAN] Skipping {symbol}@{ex_name}: insufficient metrics {sig} (fallback={used_fallback})", flush=True)
             continue
 
+        # rsi_1h is None when volume or price already failed (the indicators were not computed)
         vol_ok = sig['vol_pct_24h'] >= VOL_CHANGE_THRESHOLD_PCT
         price_ok = PRICE_MIN_PCT <= sig['price_pct_15_vs_1h'] <= PRICE_MAX_PCT
         rsi_ok = (sig['rsi_1h'] is not None) and (RSI_LOW <= sig['rsi_1h'] <= RSI_HIGH)
@@ -363,7 +604,7 @@ def scan_once():
 
         if vol_ok and price_ok and rsi_ok and macd_ok:
             coin_id = f"{ex_name}:{base}"
-            if was_alerted_recent(coin_id):
+            if coin_id in recent_ids:
                 print(f"[SCAN] SKIP recent alert {coin_id}", flush=True)
                 continue
             text = (
@@ -378,13 +619,87 @@ def scan_once():
                 f"Symbol: {symbol}\n"
                 f"(fallback_used: {used_fallback})"
             )
-            ok = send_telegram(text)
-            if ok:
-                record_alert(coin_id, symbol, "exchange_multi_tv_fallback" if used_fallback else "exchange_multi_tv", sig['price_pct_15_vs_1h'], sig['vol_pct_24h'])
-                alerts_sent.append(coin_id)
-
+            to_send.append(({
+                "coin_id": coin_id,
+                "symbol": symbol,
+                "alert_type": "exchange_multi_tv_fallback" if used_fallback else "exchange_multi_tv",
+                "pct": sig['price_pct_15_vs_1h'],
+                "volume": sig['vol_pct_24h'],
+            }, text))
+            recent_ids.add(coin_id)
+
+    # Telegram posts go out concurrently; only delivered alerts are written to Supabase
+    # (an unexpected exception from one post counts as not delivered instead of aborting the whole batch)
+    sent = await asyncio.gather(*[send_telegram(http, text) for _, text in to_send], return_exceptions=True)
+    pending_alerts = [row for (row, _), ok in zip(to_send, sent) if ok is True]
+    await record_alerts(http, pending_alerts)
+    alerts_sent = [row["coin_id"] for row in pending_alerts]
     print(f"[SCAN] Done. Alerts sent: {alerts_sent}", flush=True)
     return alerts_sent
 
+# ---------- Websocket mode ----------
+def merge_bars(buf, bars):
+    """Fold watch_ohlcv output into a bar deque: the still-open bar is replaced in place, newer bars appended"""
+    for bar in bars:
+        if buf and bar[0] == buf[-1][0]:
+            buf[-1] = bar
+        elif not buf or bar[0] > buf[-1][0]:
+            buf.append(bar)
+
+async def watch_bars(exchange, symbol, timeframe, buf):
+    while True:
+        try:
+            merge_bars(buf, await exchange.watch_ohlcv(symbol, timeframe))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[WS] watch_ohlcv error for {symbol} {timeframe} on {exchange.id}: {e}", flush=True)
+            await asyncio.sleep(5)
+
+async def watch_forever():
+    """
+    Long-running mode: seed each market's bars over REST once, keep them current with watch_ohlcv,
+    and every WATCH_SCAN_INTERVAL seconds evaluate the buffered bars without any OHLCV requests.
+    """
+    if ccxtpro is None:
+        raise SystemExit("WATCH_OHLCV=1 needs a ccxt release that ships ccxt.pro")
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=HTTP_CONCURRENCY)
+    exch_instances = build_exchange_instances(ccxtpro)
+    tasks = []
+    try:
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as http:
+            filtered = baseline_filter(await build_candidates_from_exchanges(exch_instances))
+            seeded = await fetch_all_bars(exch_instances, filtered)
+            watched = []
+            for c, res in zip(filtered, seeded):
+                # markets without 48 exchange bars would need the CoinGecko fallback on every pass; leave them to REST scans
+                if isinstance(res, Exception) or res is None or len(res) < 48:
+                    continue
+                buf1h = deque(res.tolist(), maxlen=OHLCV_LIMIT_1H)
+                tasks.append(asyncio.create_task(watch_bars(exch_instances[c['exchange']], c['market'], '1h', buf1h)))
+                watched.append((c, buf1h, IndicatorState()))
+            print(f"[WS] Watching {len(watched)} markets", flush=True)
+
+            # alerts sent by this process, so dedupe still holds if Supabase is unreachable between passes
+            alerted_at = {}
+            while True:
+                await asyncio.sleep(WATCH_SCAN_INTERVAL)
+                print(f"[SCAN] Starting scan {datetime.now(timezone.utc).isoformat()}", flush=True)
+                now = time.time()
+                alerted_at = {cid: t for cid, t in alerted_at.items() if now - t < DEDUPE_HOURS * 3600}
+                recent_ids = await load_recent_alert_ids(http, dedupe_cutoff()) | alerted_at.keys()
+                bars = [np.asarray(b1, dtype=np.float64) for _, b1, _ in watched]
+                states = [st for _, _, st in watched]
+                for st, arr1h in zip(states, bars):
+                    st.sync(arr1h)
+                for cid in await evaluate_candidates(http, [c for c, _, _ in watched], bars, recent_ids, states):
+                    alerted_at[cid] = now
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*[ex.close() for ex in exch_instances.values()], return_exceptions=True)
+
 if __name__ == "__main__":
-    scan_once()
+    asyncio.run(watch_forever() if WATCH_OHLCV else scan_once())
@@ -6,16 +6,28 @@
 
 import os
 import time
+import atexit
+import asyncio
 import requests
-import ccxt
-import pandas as pd
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import ccxt.async_support as accxt
+import numpy as np
 from datetime import datetime, timezone
 from dotenv import load_dotenv
+from scanner_common import (
+    OHLCV_LIMIT, VOL_GAIN_THRESHOLD_PCT, PRICE_BREAKOUT_LOOKBACK, PRICE_BREAKOUT_PCT,
+    get_markets, build_symbol_index, map_to_exchange_symbols, fetch_ohlcv_for_symbol, compute_indicators,
+)
+from telegram_batch import send_all_telegram
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
+from contextlib import contextmanager
 from urllib.parse import urlparse
 import socket
-import sys
+import io
 
 load_dotenv()
 
@@ -29,20 +41,33 @@ if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID or not SUPABASE_DB_URL:
 TELEGRAM_CHAT_ID = int(TELEGRAM_CHAT_ID)
 TELEGRAM_API_BASE = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
 
+# Shared HTTP session: keeps TLS connections to CoinGecko warm across calls
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504]),
+))
+SESSION.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip"})
+
 # Scanner config (tune as needed)
 COINGECKO_TOP = 200
 MIN_24H_PCT = 10.0
 MIN_VOLUME_USD = 100000.0
-VOL_GAIN_WINDOW = 10
-VOL_GAIN_THRESHOLD_PCT = 150.0
-PRICE_BREAKOUT_LOOKBACK = 20
-PRICE_BREAKOUT_PCT = 1.5
 RSI_LOWER = 20
 RSI_UPPER = 85
-OHLCV_LIMIT = 500
-SLEEP_BETWEEN_SYMBOLS = 0.5
+OHLCV_CONCURRENCY = 10  # in-flight fetch_ohlcv requests; ccxt's rate limiter still paces them
 CONNECT_TIMEOUT = 10  # seconds for DB connect attempts
 IPV4_CONNECT_ATTEMPTS = 3
+TELEGRAM_CONCURRENCY = 4  # alert messages in flight at once
+# CoinGecko markets disk cache. The file is kept for conditional requests: scheduled runs are ~10 min apart,
+# so it is normally stale and only its ETag/Last-Modified are used (a 304 reuses the body). CG_CACHE_TTL is
+# kept short on purpose because the 24h % change drives selection; it only covers back-to-back manual reruns.
+CG_CACHE_TTL = 45  # seconds a cached body is served without asking CoinGecko
+CG_CACHE_PATH = "cg_top_markets.json"  # last markets response + validators, shared across runs
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 4
+ALERTS_COPY_MIN_ROWS = 100  # batches at least this large go through COPY FROM STDIN instead of INSERT
 
 # --- Postgres helpers
 def parse_db_url(url):
@@ -54,40 +79,48 @@ def parse_db_url(url):
     dbname = p.path.lstrip('/') or "postgres"
     return username, password, hostname, port, dbname
 
-def try_connect_ipv4(username, password, host, port, dbname):
-    """
-    Resolve IPv4 addresses for host and try to connect to each one.
-    Returns a live connection or raises the last exception.
-    """
-    last_exc = None
+# libpq TCP keepalives so Supabase's idle-connection reaper doesn't silently kill pooled connections
+POOL_CONN_KW = dict(
+    sslmode="require",
+    connect_timeout=CONNECT_TIMEOUT,
+    keepalives=1,
+    keepalives_idle=30,
+    keepalives_interval=10,
+    keepalives_count=3,
+    cursor_factory=psycopg2.extras.RealDictCursor,
+)
+def resolve_ipv4(host, port):
+    """Unique IPv4 addresses for host, in resolver order (empty if none)."""
     try:
         infos = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)
     except Exception as e:
         # no IPv4 addresses found
         infos = []
-
-    # iterate unique IPv4 addresses
-    seen = set()
+    addrs = []
     for info in infos:
-        addr = info[4][0]
-        if addr in seen:
-            continue
-        seen.add(addr)
+        if info[4][0] not in addrs:
+            addrs.append(info[4][0])
+    return addrs
+
+# Parse the DB URL and resolve its IPv4 addresses once at import, not per connection
+_PG_USER, _PG_PASSWORD, _PG_HOST, _PG_PORT, _PG_DBNAME = parse_db_url(SUPABASE_DB_URL)
+_PG_IPV4 = resolve_ipv4(_PG_HOST, _PG_PORT)
+_PG_KW = dict(port=_PG_PORT, dbname=_PG_DBNAME, user=_PG_USER, password=_PG_PASSWORD, **POOL_CONN_KW)
+_POOL = None
+
+def try_pool_ipv4():
+    """
+    Try to open a connection pool on each resolved IPv4 address.
+    Returns a pool holding a live connection or raises the last exception.
+    """
+    last_exc = None
+    for addr in _PG_IPV4:
         for attempt in range(IPV4_CONNECT_ATTEMPTS):
             try:
-                print(f"[DB] Trying IPv4 connect to {addr}:{port} (attempt {attempt+1})", flush=True)
-                conn = psycopg2.connect(
-                    host=addr,
-                    port=port,
-                    dbname=dbname,
-                    user=username,
-                    password=password,
-                    sslmode="require",
-                    connect_timeout=CONNECT_TIMEOUT,
-                    cursor_factory=psycopg2.extras.RealDictCursor,
-                )
+                print(f"[DB] Trying IPv4 connect to {addr}:{_PG_PORT} (attempt {attempt+1})", flush=True)
+                pool = psycopg2.pool.ThreadedConnectionPool(POOL_MIN_CONN, POOL_MAX_CONN, host=addr, **_PG_KW)
                 print(f"[DB] Connected to {addr}", flush=True)
-                return conn
+                return pool
             except Exception as e:
                 last_exc = e
                 print(f"[DB] IPv4 connect to {addr} failed: {e}", flush=True)
@@ -98,24 +131,42 @@ def try_connect_ipv4(username, password, host, port, dbname):
     # No IPv4 addresses at all, raise to allow fallback
     raise RuntimeError("No IPv4 addresses found for host")
 
-def get_conn():
+def get_pool():
     """
-    Connect to Postgres using IPv4 if possible; fall back to original URL connect.
+    Create the Postgres connection pool once, using IPv4 if possible; fall back to the original URL.
     """
-    username, password, host, port, dbname = parse_db_url(SUPABASE_DB_URL)
+    global _POOL
+    if _POOL is not None:
+        return _POOL
     # first try IPv4-based connects
     try:
-        return try_connect_ipv4(username, password, host, port, dbname)
+        _POOL = try_pool_ipv4()
     except Exception as e:
         print(f"[DB] IPv4 connection attempts failed: {e}. Falling back to direct DSN connect (may use IPv6).", flush=True)
-        # fallback: try standard psycopg2.connect with DSN (this mirrors SUPABASE_DB_URL)
+        # fallback: pool over the DSN itself (this mirrors SUPABASE_DB_URL)
         try:
-            conn = psycopg2.connect(SUPABASE_DB_URL, cursor_factory=psycopg2.extras.RealDictCursor, connect_timeout=CONNECT_TIMEOUT)
+            _POOL = psycopg2.pool.ThreadedConnectionPool(POOL_MIN_CONN, POOL_MAX_CONN, SUPABASE_DB_URL, **POOL_CONN_KW)
             print("[DB] Connected via DSN fallback", flush=True)
-            return conn
         except Exception as e2:
             print(f"[DB] DSN fallback also failed: {e2}", flush=True)
             raise
+    # close pooled connections cleanly on exit instead of leaving Supabase to reap them
+    atexit.register(_POOL.closeall)
+    return _POOL
+
+@contextmanager
+def borrow():
+    """Lend a pooled connection; connections that died mid-use are discarded instead of returned."""
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken or bool(conn.closed))
 
 def ensure_table():
     sql = """
@@ -128,39 +179,71 @@ def ensure_table():
       pct NUMERIC,
       volume NUMERIC
     );
+    -- dedupe lookups: recent ids by alert_time here, coin_id + alert_time from the HTTP scanner
+    CREATE INDEX IF NOT EXISTS alerts_time_idx ON alerts (alert_time DESC);
+    CREATE INDEX IF NOT EXISTS alerts_coin_time_idx ON alerts (coin_id, alert_time DESC);
+    -- one alert per coin and type per UTC hour, enforced by the database (see claim_alerts)
+    ALTER TABLE alerts ADD COLUMN IF NOT EXISTS alert_bucket TIMESTAMP
+      GENERATED ALWAYS AS (date_trunc('hour', alert_time AT TIME ZONE 'UTC')) STORED;
+    -- rows written before the index existed may repeat within an hour; keep the first so the index builds
+    DELETE FROM alerts a USING alerts b
+      WHERE a.coin_id = b.coin_id AND a.alert_type = b.alert_type
+        AND a.alert_bucket = b.alert_bucket AND a.id > b.id;
+    CREATE UNIQUE INDEX IF NOT EXISTS alerts_dedup ON alerts (coin_id, alert_type, alert_bucket);
     """
-    with get_conn() as conn:
+    with borrow() as conn:
         with conn.cursor() as cur:
             cur.execute(sql)
             conn.commit()
     print("[DB] ensured alerts table exists", flush=True)
 
-def was_alerted_recent(coin_id, hours=6):
-    sql = "SELECT 1 FROM alerts WHERE coin_id = %s AND alert_time >= (now() - (%s || ' hours')::interval) LIMIT 1"
-    with get_conn() as conn:
+def load_recent_alert_ids(hours=6):
+    """coin_ids alerted within the last `hours`, fetched in one query per scan"""
+    sql = "SELECT DISTINCT coin_id FROM alerts WHERE alert_time >= (now() - (%s || ' hours')::interval)"
+    with borrow() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, (coin_id, hours))
-            found = cur.fetchone() is not None
-            return found
+            cur.execute(sql, (hours,))
+            return {row["coin_id"] for row in cur.fetchall()}
+
+def _copy_field(v):
+    # COPY text format: \N is NULL; backslash, tab and newlines must be escaped
+    if v is None:
+        return "\\N"
+    return str(v).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
 
-def record_alert(coin_id, symbol, alert_type, pct, volume):
-    sql = "INSERT INTO alerts (coin_id, symbol, alert_type, pct, volume, alert_time) VALUES (%s, %s, %s, %s, %s, now())"
-    with get_conn() as conn:
+def claim_alerts(rows):
+    """
+    rows: (coin_id, symbol, alert_type, pct, volume, alert_time) tuples. Each row is inserted unless its
+    (coin_id, alert_type) already has an alert in the same hour (alerts_dedup), so overlapping scans can't
+    both send it. Returns {(coin_id, alert_type): id} for the rows actually inserted.
+    Large batches are streamed with COPY FROM STDIN into a temp table first, since COPY can't skip conflicts.
+    """
+    if not rows:
+        return {}
+    cols = "coin_id, symbol, alert_type, pct, volume, alert_time"
+    on_conflict = "ON CONFLICT (coin_id, alert_type, alert_bucket) DO NOTHING RETURNING id, coin_id, alert_type"
+    with borrow() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, (coin_id, symbol, alert_type, pct, volume))
+            if len(rows) >= ALERTS_COPY_MIN_ROWS:
+                cur.execute(f"CREATE TEMP TABLE alerts_in ON COMMIT DROP AS SELECT {cols} FROM alerts WITH NO DATA")
+                buf = io.StringIO("".join("\t".join(_copy_field(v) for v in row) + "\n" for row in rows))
+                cur.copy_expert(f"COPY alerts_in ({cols}) FROM STDIN", buf)
+                cur.execute(f"INSERT INTO alerts ({cols}) SELECT {cols} FROM alerts_in {on_conflict}")
+                claimed = cur.fetchall()
+            else:
+                sql = f"INSERT INTO alerts ({cols}) VALUES %s {on_conflict}"
+                claimed = psycopg2.extras.execute_values(cur, sql, rows, fetch=True)
             conn.commit()
+    return {(row["coin_id"], row["alert_type"]): row["id"] for row in claimed}
 
-# --- Telegram
-def send_telegram(text):
-    url = TELEGRAM_API_BASE + "/sendMessage"
-    payload = {"chat_id": TELEGRAM_CHAT_ID, "text": text}
-    try:
-        r = requests.post(url, data=payload, timeout=15)
-        r.raise_for_status()
-        return True
-    except Exception as e:
-        print("Telegram send error:", e, flush=True)
-        return False
+def release_alerts(ids):
+    """Delete claimed rows whose Telegram send failed, so a later scan can alert them again"""
+    if not ids:
+        return
+    with borrow() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM alerts WHERE id = ANY(%s)", (list(ids),))
+            conn.commit()
 
 # --- CoinGecko / exchange helpers
 def coingecko_top_markets(limit=COINGECKO_TOP):
@@ -172,88 +255,83 @@ def coingecko_top_markets(limit=COINGECKO_TOP):
         "page": 1,
         "price_change_percentage": "24h"
     }
-    r = requests.get(url, params=params, timeout=15)
-    r.raise_for_status()
-    return r.json()
-
-def map_to_exchange_symbols(exchange, coin_list):
-    markets = exchange.load_markets()
-    mapped = []
-    for coin in coin_list:
-        sym = (coin.get("symbol") or "").upper()
-        candidates = [f"{sym}/USDT", f"{sym}/BUSD", f"{sym}/USD"]
-        for c in candidates:
-            if c in markets:
-                mapped.append((coin, c))
-                break
-    print(f"Mapped {len(mapped)} symbols to exchange markets", flush=True)
-    return mapped
-
-def fetch_ohlcv_for_symbol(exchange, symbol, timeframe='1m', limit=OHLCV_LIMIT):
+    # served as-is only within CG_CACHE_TTL; otherwise revalidated with ETag/Last-Modified, and a 304 reuses
+    # the body without downloading it again
+    cached = None
     try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
-        if not ohlcv:
-            return None
-        df = pd.DataFrame(ohlcv, columns=['timestamp','open','high','low','close','volume'])
-        df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('datetime', inplace=True)
-        return df[['open','high','low','close','volume']]
-    except Exception as e:
-        print("fetch_ohlcv error for", symbol, e, flush=True)
-        return None
+        with open(CG_CACHE_PATH, "rb") as fh:
+            cached = orjson.loads(fh.read())
+        if cached.get("limit") != limit:
+            cached = None
+        elif time.time() - os.path.getmtime(CG_CACHE_PATH) < CG_CACHE_TTL:
+            return cached["data"]
+    except (OSError, ValueError):
+        cached = None
 
-def compute_indicators(df):
-    df_15 = df.resample('15T').agg({'open':'first','high':'max','low':'min','close':'last','volume':'sum'}).dropna()
-    df_1h = df.resample('1H').agg({'open':'first','high':'max','low':'min','close':'last','volume':'sum'}).dropna()
-    if len(df_15) < VOL_GAIN_WINDOW + 2 or len(df_1h) < 2:
-        return None
-    # RSI using ta
-    from ta.momentum import RSIIndicator
-    df_15 = df_15.copy()
-    df_1h = df_1h.copy()
-    df_15['RSI'] = RSIIndicator(df_15['close'], window=14).rsi()
-    df_1h['RSI'] = RSIIndicator(df_1h['close'], window=14).rsi()
-    last_15 = df_15.iloc[-1]
-    prev_15 = df_15.iloc[-(VOL_GAIN_WINDOW+1):-1]
-    avg_vol = prev_15['volume'].mean()
-    vol_gain_pct = (last_15['volume'] / avg_vol * 100) if avg_vol > 0 else 0
-    last_close = last_15['close']
-    recent_section = df_15['high'].iloc[-(PRICE_BREAKOUT_LOOKBACK+1):-1]
-    recent_high = recent_section.max() if not recent_section.empty else float('nan')
-    breakout_pct = ((last_close - recent_high) / recent_high * 100) if recent_high and recent_high > 0 else 0
-    rsi_15 = last_15['RSI']
-    rsi_1h = df_1h['RSI'].iloc[-1]
-    return {
-        "vol_gain_pct": float(vol_gain_pct),
-        "breakout_pct": float(breakout_pct),
-        "rsi_15": float(rsi_15) if not pd.isna(rsi_15) else None,
-        "rsi_1h": float(rsi_1h) if not pd.isna(rsi_1h) else None,
-        "last_close": float(last_close),
-        "recent_high": float(recent_high) if not pd.isna(recent_high) else None
-    }
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    r = SESSION.get(url, params=params, headers=headers, timeout=15)
+    if r.status_code == 304 and cached:
+        os.utime(CG_CACHE_PATH)
+        return cached["data"]
+    r.raise_for_status()
+    data = orjson.loads(r.content)
+    try:
+        with open(CG_CACHE_PATH + ".tmp", "wb") as fh:
+            fh.write(orjson.dumps({"limit": limit, "etag": r.headers.get("ETag"),
+                                   "last_modified": r.headers.get("Last-Modified"), "data": data}))
+        os.replace(CG_CACHE_PATH + ".tmp", CG_CACHE_PATH)
+    except OSError as e:
+        print("coingecko cache write error:", e, flush=True)
+    return data
 
-def scan_once():
+async def scan_once():
     print("Starting scan", flush=True)
     markets = coingecko_top_markets(COINGECKO_TOP)
-    candidates = [m for m in markets if (m.get("price_change_percentage_24h") or 0) >= MIN_24H_PCT and (m.get("total_volume") or 0) >= MIN_VOLUME_USD]
+    pcts = np.fromiter((m.get("price_change_percentage_24h") or 0.0 for m in markets), dtype=np.float64, count=len(markets))
+    vols = np.fromiter((m.get("total_volume") or 0.0 for m in markets), dtype=np.float64, count=len(markets))
+    candidates = [markets[i] for i in np.flatnonzero((pcts >= MIN_24H_PCT) & (vols >= MIN_VOLUME_USD))]
     print("Candidates after CG filter:", len(candidates), flush=True)
+    recent = load_recent_alert_ids()
 
-    exchange = ccxt.binance({"enableRateLimit": True})
-    mapped = []
+    exchange = accxt.binance({"enableRateLimit": True})
+    results = []
     try:
-        exchange.load_markets()
-        mapped = map_to_exchange_symbols(exchange, candidates)
-    except Exception as e:
-        print("Exchange load error, will skip exchange symbol matching", e, flush=True)
         mapped = []
+        try:
+            ex_markets = await get_markets(exchange)
+            mapped = map_to_exchange_symbols(build_symbol_index(ex_markets), candidates)
+            print(f"Mapped {len(mapped)} symbols to exchange markets", flush=True)
+        except Exception as e:
+            print("Exchange load error, will skip exchange symbol matching", e, flush=True)
+            mapped = []
 
-    alerts_sent = []
-    for coin, symbol in mapped:
-        time.sleep(SLEEP_BETWEEN_SYMBOLS)
-        df = fetch_ohlcv_for_symbol(exchange, symbol, timeframe='1m', limit=OHLCV_LIMIT)
-        if df is None:
+        sem = asyncio.Semaphore(OHLCV_CONCURRENCY)
+
+        async def bounded_fetch(coin, symbol):
+            async with sem:
+                ohlcv = await fetch_ohlcv_for_symbol(exchange, symbol, timeframe='1m', limit=OHLCV_LIMIT)
+            if ohlcv is None:
+                return None
+            return coin, symbol, compute_indicators(ohlcv)
+
+        results = await asyncio.gather(*[bounded_fetch(coin, symbol) for coin, symbol in mapped], return_exceptions=True)
+    finally:
+        await exchange.close()
+
+    to_send = []  # ((coin_id, symbol, alert_type, pct, volume), text), sent together at the end
+    queued = set()
+    for res in results:
+        if isinstance(res, Exception):
+            print("scan task error:", res, flush=True)
+            continue
+        if res is None:
             continue
-        ind = compute_indicators(df)
+        coin, symbol, ind = res
         if not ind:
             continue
         vol_ok = ind['vol_gain_pct'] >= VOL_GAIN_THRESHOLD_PCT
@@ -261,7 +339,7 @@ def scan_once():
         rsi_ok = (ind['rsi_15'] is not None and ind['rsi_1h'] is not None and ind['rsi_15'] > RSI_LOWER and ind['rsi_1h'] < RSI_UPPER)
         if vol_ok and breakout_ok and rsi_ok:
             coin_id = coin.get("id")
-            if was_alerted_recent(coin_id):
+            if coin_id in recent:
                 print("SKIP recent alert", coin_id, flush=True)
                 continue
             text = (
@@ -274,35 +352,48 @@ def scan_once():
                 f"CoinGecko 24h change: {coin.get('price_change_percentage_24h'):.2f}%\n"
                 f"https://www.coingecko.com/en/coins/{coin_id}"
             )
-            ok = send_telegram(text)
-            if ok:
-                record_alert(coin_id, coin.get("symbol").upper(), "indicator", ind['vol_gain_pct'], ind.get('last_close'))
-                alerts_sent.append(coin_id)
+            to_send.append(((coin_id, coin.get("symbol").upper(), "indicator", ind['vol_gain_pct'], ind.get('last_close')), text))
+            queued.add(coin_id)
 
-    for coin in markets:
+    # CoinGecko-only alerts for the remaining candidates that got no indicator alert above
+    for coin in candidates:
         coin_id = coin.get("id")
-        if coin_id in alerts_sent:
+        if coin_id in recent or coin_id in queued:
             continue
         pct = float(coin.get("price_change_percentage_24h") or 0)
         vol = float(coin.get("total_volume") or 0)
-        if pct >= MIN_24H_PCT and vol >= MIN_VOLUME_USD:
-            if was_alerted_recent(coin_id):
-                continue
-            text = (
-                f"COINGECKO ALERT: {coin.get('symbol','').upper()} / {coin.get('name')}\n"
-                f"Price: ${coin.get('current_price')}\n"
-                f"24h Change: {pct:.2f}%\n"
-                f"24h Volume: ${vol:,.0f}\n"
-                f"https://www.coingecko.com/en/coins/{coin_id}"
-            )
-            ok = send_telegram(text)
-            if ok:
-                record_alert(coin_id, coin.get("symbol","").upper(), "24h_pct", pct, vol)
-                alerts_sent.append(coin_id)
+        text = (
+            f"COINGECKO ALERT: {coin.get('symbol','').upper()} / {coin.get('name')}\n"
+            f"Price: ${coin.get('current_price')}\n"
+            f"24h Change: {pct:.2f}%\n"
+            f"24h Volume: ${vol:,.0f}\n"
+            f"https://www.coingecko.com/en/coins/{coin_id}"
+        )
+        to_send.append(((coin_id, coin.get("symbol","").upper(), "24h_pct", pct, vol), text))
+        queued.add(coin_id)
+
+    # claim before sending: only alerts this scan managed to insert go out; failed sends are released
+    claimed_at = datetime.now(timezone.utc)
+    claims = claim_alerts([alert + (claimed_at,) for alert, _ in to_send])
+    for alert, _ in to_send:
+        if (alert[0], alert[2]) not in claims:
+            print("SKIP already claimed", alert[0], flush=True)
+    to_send = [(alert, text) for alert, text in to_send if (alert[0], alert[2]) in claims]
+
+    sent = await send_all_telegram(TELEGRAM_API_BASE, TELEGRAM_CHAT_ID, [text for _, text in to_send], TELEGRAM_CONCURRENCY)
+    alerts_sent = []
+    failed = []
+    for (alert, _), ok in zip(to_send, sent):
+        if ok:
+            recent.add(alert[0])
+            alerts_sent.append(alert[0])
+        else:
+            failed.append(claims[(alert[0], alert[2])])
+    release_alerts(failed)
 
     print("Done. Alerts sent:", alerts_sent, flush=True)
     return alerts_sent
 
 if __name__ == "__main__":
     ensure_table()
-    scan_once()
+    asyncio.run(scan_once())
@@ -1,8 +1,10 @@
 # show_alerts.py
-import sqlite3, pandas as pd
+import sqlite3
 con = sqlite3.connect("alerts.db")
 try:
-    df = pd.read_sql_query("SELECT * FROM alerts ORDER BY alert_time DESC LIMIT 10", con)
-    print(df.to_string(index=False))
+    cur = con.execute("SELECT * FROM alerts ORDER BY alert_time DESC LIMIT 10")
+    print("\t".join(d[0] for d in cur.description))
+    for row in cur:
+        print("\t".join(str(v) for v in row))
 finally:
     con.close()
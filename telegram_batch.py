@@ -0,0 +1,36 @@
+# telegram_batch.py
+# Batched Telegram delivery shared by the scanners.
+# - all texts go out concurrently over one aiohttp session, at most `concurrency` connections in flight
+# - 429 responses are retried after Telegram's retry_after
+
+import asyncio
+import aiohttp
+
+async def send_all_telegram(api_base, chat_id, texts, concurrency=4):
+    """
+    Post all alert texts to chat_id via the bot API at api_base (https://api.telegram.org/bot<token>).
+    Returns a success flag per text, in order.
+    """
+    if not texts:
+        return []
+    url = api_base + "/sendMessage"
+    timeout = aiohttp.ClientTimeout(total=10)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as cli:
+        async def post(text):
+            for attempt in range(3):
+                try:
+                    async with cli.post(url, json={"chat_id": chat_id, "text": text}) as r:
+                        if r.status == 429:
+                            body = await r.json(content_type=None)
+                            await asyncio.sleep((body.get("parameters") or {}).get("retry_after", 1))
+                            continue
+                        if r.status >= 400:
+                            print("Telegram send error:", r.status, await r.text(), flush=True)
+                            return False
+                        return True
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    print("Telegram send error:", e, flush=True)
+                    return False
+            return False
+        return await asyncio.gather(*[post(t) for t in texts])